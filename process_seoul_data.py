@@ -1,6 +1,30 @@
+import argparse
+import bisect
+import contextlib
 import csv
+import gzip
+import io
 import json
+import math
+import mmap
 import os
+import random
+import sqlite3
+import tempfile
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard # Optional: only needed for .csv.zst inputs
+except ImportError:
+    zstandard = None
+
+try:
+    import numpy as np # Optional: only needed for the similarity artifact
+except ImportError:
+    np = None
 
 # File Paths
 FILE_REVENUE = 'public/data/revenue_dong.csv'
@@ -9,6 +33,26 @@ FILE_COST = 'public/data/startup_costs_2024.csv'
 FILE_POP = 'public/data/pop_dong_filtered.csv' # Use filtered pop/rent for efficiency
 FILE_RENT = 'public/data/rent_dong_filtered.csv'
 OUTPUT_FILE = 'public/data/seoul_biz_data.json'
+SIMILARITY_FILE = 'public/data/dong_similarity.json'
+SIMILARITY_TOP_K = 10
+CATEGORY_FILE = 'public/data/category_stats.json'
+QUANTILE_FILE = 'public/data/revenue_quantiles.json'
+QUANTILES = (0.1, 0.5, 0.9)
+TDIGEST_COMPRESSION = 100
+SQLITE_FILE = 'seoul_biz_data.sqlite' # Query artifact; kept out of public/ so Vite doesn't copy it into dist
+SQLITE_BATCH = 10000
+PREVIEW_FILE = 'public/data/seoul_biz_data.preview.json'
+PREVIEW_SAMPLE_SIZE = 4 # Rows kept per (dong, industry) and file
+PREVIEW_SEED = 0
+# Two-sided 95% Student-t critical values by degrees of freedom (1-30);
+# past the table the normal value is close enough.
+T_95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+Z_95 = 1.96
+DATA_DIR = 'public/data'
+WATCH_INTERVAL = 1.0 # Seconds between directory scans
+WATCH_DEBOUNCE = 2.0 # Quiet period before a change is rebuilt
 
 # Mappings
 NAME_MAPPING = {
@@ -26,10 +70,222 @@ NAME_MAPPING = {
     "서적": "서적", "문구": "문구", "스포츠클럽": "스포츠클럽"
 }
 
+# Compressed Inputs
+# Every FILE_* path may also be stored as '<path>.gz' or '<path>.zst'.
+# Multi-member gzip / multi-frame zstd files are decompressed in parallel
+# (zlib and zstd release the GIL), and rows are streamed in file order.
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+DECOMPRESS_WORKERS = os.cpu_count() or 1
+DECOMPRESS_PIECE = 1 << 20 # Bytes fed to / read from a decompressor per call
+DECOMPRESS_MEMBER_LIMIT = 16 << 20 # Larger members are streamed by the reader, not buffered by a worker
+GZIP_MAGIC = b'\x1f\x8b\x08'
+ZSTD_MAGIC = 0xFD2FB528
+
+def resolve_input(path):
+    if os.path.exists(path): return path
+    for suffix in COMPRESSED_SUFFIXES:
+        if os.path.exists(path + suffix): return path + suffix
+    return path # Let open() raise the usual FileNotFoundError
+
+def _ordered_parallel(func, items):
+    # Like executor.map, but with a bounded window so output stays streamed.
+    with ThreadPoolExecutor(max_workers=DECOMPRESS_WORKERS) as pool:
+        window = deque()
+        for item in items:
+            window.append(pool.submit(func, item))
+            if len(window) >= DECOMPRESS_WORKERS * 2:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+def _buffer_member(pieces):
+    # Collect a member's pieces on a worker thread. Returns (pieces, end), or
+    # (None, None) when the member is too large to buffer; the reader streams it.
+    out, size = [], 0
+    try:
+        while size <= DECOMPRESS_MEMBER_LIMIT:
+            piece = next(pieces)
+            out.append(piece)
+            size += len(piece)
+    except StopIteration as stop:
+        return out, stop.value
+    finally:
+        pieces.close()
+    return None, None
+
+def _gzip_header_ok(buf, pos):
+    # Reserved flag bits clear, a known XFL value and a known OS byte.
+    if pos + 10 > len(buf): return False
+    return buf[pos + 3] & 0xE0 == 0 and buf[pos + 8] in (0, 2, 4) and (buf[pos + 9] <= 13 or buf[pos + 9] == 255)
+
+def _gzip_candidates(buf, start=0):
+    # Magic bytes also occur inside compressed data (about once per 16 MB),
+    # so only offsets with a plausible header are worth a decode attempt.
+    pos = buf.find(GZIP_MAGIC, start)
+    while pos != -1:
+        if _gzip_header_ok(buf, pos): yield pos
+        pos = buf.find(GZIP_MAGIC, pos + 1)
+
+def _gzip_pieces(buf, start):
+    # Inflate the member at `start` in bounded pieces; returns its end offset.
+    d = zlib.decompressobj(31)
+    pos = start
+    while not d.eof:
+        if d.unconsumed_tail:
+            chunk = d.unconsumed_tail
+        elif pos < len(buf):
+            chunk = buf[pos:pos + DECOMPRESS_PIECE]
+            pos += len(chunk)
+        else:
+            raise EOFError(f"Truncated gzip member at offset {start}")
+        piece = d.decompress(chunk, DECOMPRESS_PIECE)
+        if piece: yield piece
+    return pos - len(d.unused_data)
+
+def _gzip_member(job):
+    buf, start = job
+    try:
+        return (start, *_buffer_member(_gzip_pieces(buf, start)))
+    except (zlib.error, EOFError):
+        return start, None, False # Not a member after all
+
+def _is_multi_member(buf):
+    # A later candidate counts only if its first piece actually inflates;
+    # a chance match inside deflate data fails almost immediately.
+    with memoryview(buf) as view:
+        for pos in _gzip_candidates(buf, 1):
+            pieces = _gzip_pieces(view, pos)
+            try:
+                next(pieces, None)
+                return True
+            except (zlib.error, EOFError):
+                continue
+            finally:
+                pieces.close()
+    return False
+
+def _iter_gzip_members(buf):
+    expected = 0
+    with memoryview(buf) as view:
+        for start, pieces, end in _ordered_parallel(_gzip_member, ((view, c) for c in _gzip_candidates(buf))):
+            if start != expected: continue # False-positive candidate inside a member
+            if end is False: raise OSError(f"Corrupt gzip member at offset {start}")
+            if end is None:
+                try:
+                    end = yield from _gzip_pieces(view, start)
+                except zlib.error as e:
+                    raise OSError(f"Corrupt gzip member at offset {start}: {e}")
+            else:
+                yield from pieces
+            expected = end
+    if expected < len(buf) and buf[expected:].strip(b'\x00'):
+        raise OSError(f"Trailing garbage after gzip member at offset {expected}")
+
+def _zstd_frame_spans(buf):
+    # Walk frame/block headers (no decompression) to find frame boundaries.
+    pos = 0
+    while pos < len(buf):
+        magic = int.from_bytes(buf[pos:pos + 4], 'little')
+        if magic & 0xFFFFFFF0 == 0x184D2A50: # Skippable frame
+            pos += 8 + int.from_bytes(buf[pos + 4:pos + 8], 'little')
+            continue
+        if magic != ZSTD_MAGIC: raise OSError(f"Bad zstd frame magic at offset {pos}")
+
+        start = pos
+        fhd = buf[pos + 4]
+        single_segment = (fhd >> 5) & 1
+        fcs_size = {0: single_segment, 1: 2, 2: 4, 3: 8}[fhd >> 6]
+        did_size = {0: 0, 1: 1, 2: 2, 3: 4}[fhd & 3]
+        pos += 5 + (0 if single_segment else 1) + did_size + fcs_size
+
+        last = False
+        while not last:
+            header = int.from_bytes(buf[pos:pos + 3], 'little')
+            last = header & 1
+            block_type = (header >> 1) & 3
+            block_size = header >> 3
+            pos += 3 + (1 if block_type == 1 else block_size) # RLE blocks store one byte
+        if (fhd >> 2) & 1: pos += 4 # Content checksum
+        yield start, pos
+
+def _zstd_pieces(buf, start, end):
+    with zstandard.ZstdDecompressor().stream_reader(buf[start:end]) as reader:
+        while True:
+            piece = reader.read(DECOMPRESS_PIECE)
+            if not piece: return end
+            yield piece
+
+def _zstd_frame(job):
+    buf, start, end = job
+    return start, end, _buffer_member(_zstd_pieces(buf, start, end))[0]
+
+def _iter_zstd_frames(buf, spans):
+    with memoryview(buf) as view:
+        for start, end, pieces in _ordered_parallel(_zstd_frame, ((view, start, end) for start, end in spans)):
+            yield from _zstd_pieces(view, start, end) if pieces is None else pieces
+
+class _ChunkStream(io.RawIOBase):
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b'')
+        self._offset = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        # Advance an offset into the current chunk; re-slicing it would copy
+        # the remainder on every read.
+        while self._offset >= len(self._pending):
+            chunk = next(self._chunks, None)
+            if chunk is None: return 0
+            self._pending, self._offset = memoryview(chunk), 0
+        n = min(len(b), len(self._pending) - self._offset)
+        b[:n] = self._pending[self._offset:self._offset + n]
+        self._offset += n
+        return n
+
+    def close(self):
+        # Stops the decompression generator (and its thread pool) early.
+        if hasattr(self._chunks, 'close'): self._chunks.close()
+        super().close()
+
+@contextlib.contextmanager
+def open_input(path, encoding):
+    # Text-mode open() replacement that understands .gz / .zst sources.
+    # Single-member/frame files are streamed straight from the file handle;
+    # multi-member/frame files are mmapped and split for parallel workers.
+    path = resolve_input(path)
+    with contextlib.ExitStack() as stack:
+        if path.endswith(COMPRESSED_SUFFIXES):
+            if path.endswith('.zst') and zstandard is None:
+                raise ImportError(f"{path} needs the 'zstandard' package")
+            raw = stack.enter_context(open(path, 'rb'))
+            size = os.fstat(raw.fileno()).st_size
+            buf = stack.enter_context(mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ)) if size else b''
+
+        if path.endswith('.gz'):
+            if _is_multi_member(buf):
+                stream = io.BufferedReader(_ChunkStream(_iter_gzip_members(buf)))
+            else:
+                raw.seek(0)
+                stream = gzip.GzipFile(fileobj=raw)
+        elif path.endswith('.zst'):
+            spans = list(_zstd_frame_spans(buf))
+            if len(spans) > 1:
+                stream = io.BufferedReader(_ChunkStream(_iter_zstd_frames(buf, spans)))
+            else:
+                raw.seek(0)
+                stream = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=False))
+        else:
+            stream = open(path, 'rb')
+        with io.TextIOWrapper(stream, encoding=encoding, newline='') as f:
+            yield f
+
 def load_startup_costs():
     costs = {}
     try:
-        with open(FILE_COST, 'r', encoding='utf-8') as f:
+        with open_input(FILE_COST, 'utf-8') as f:
             reader = csv.DictReader(f)
             for row in reader:
                 name = row.get('서비스_업종_코드_명')
@@ -59,7 +315,7 @@ def load_pop_rent():
     
     # Pop (utf-8)
     try:
-        with open(FILE_POP, 'r', encoding='utf-8') as f:
+        with open_input(FILE_POP, 'utf-8') as f:
             reader = csv.DictReader(f)
             for row in reader:
                 dong = normalize_dong(row.get('행정동_코드_명'))
@@ -69,7 +325,7 @@ def load_pop_rent():
 
     # Rent (utf-8)
     try:
-        with open(FILE_RENT, 'r', encoding='utf-8') as f:
+        with open_input(FILE_RENT, 'utf-8') as f:
             reader = csv.DictReader(f)
             for row in reader:
                 dong = normalize_dong(row.get('행정구역'))
@@ -84,108 +340,241 @@ def load_pop_rent():
     
     return pop_map, rent_map
 
-def process_data():
-    costs = load_startup_costs()
-    pop_map, rent_map = load_pop_rent()
-    
-    final_data = {} 
+def load_gu_map():
+    # The rent export lists each 구 followed by its 동 rows.
+    gu_map = {}
+    try:
+        with open_input(FILE_RENT, 'utf-8') as f:
+            gu = None
+            for row in csv.DictReader(f):
+                name = (row.get('행정구역') or '').strip()
+                if name.endswith('구'): gu = name
+                elif gu and name: gu_map[normalize_dong(name)] = gu
+    except Exception as e: print(f"Gu map error: {e}")
+    return gu_map
+
+# Measures: (key, sub-key, column). sub-key None means a scalar field.
+STORE_MEASURES = [('open', None, '개업_점포_수'), ('close', None, '폐업_점포_수')]
+REVENUE_MEASURES = [
+    ('rev', None, '당월_매출_금액'),
+    ('time', 0, '시간대_00~06_매출_금액'), ('time', 1, '시간대_06~11_매출_금액'),
+    ('time', 2, '시간대_11~14_매출_금액'), ('time', 3, '시간대_14~17_매출_금액'),
+    ('time', 4, '시간대_17~21_매출_금액'), ('time', 5, '시간대_21~24_매출_금액'),
+    ('age', '10', '연령대_10_매출_금액'), ('age', '20', '연령대_20_매출_금액'),
+    ('age', '30', '연령대_30_매출_금액'), ('age', '40', '연령대_40_매출_금액'),
+    ('age', '50', '연령대_50_매출_금액'), ('age', '60', '연령대_60_이상_매출_금액'),
+    ('day', 'Mon', '월요일_매출_금액'), ('day', 'Tue', '화요일_매출_금액'),
+    ('day', 'Wed', '수요일_매출_금액'), ('day', 'Thu', '목요일_매출_금액'),
+    ('day', 'Fri', '금요일_매출_금액'), ('day', 'Sat', '토요일_매출_금액'),
+    ('day', 'Sun', '일요일_매출_금액'),
+]
+ANALYSIS_YEARS = ('2023', '2024')
 
-    def get_dong_entry(dong):
+def new_industry(cost, count=0):
+    return {
+        'rev': 0, 'count': count, 'open': 0, 'close': 0,
+        'cost': cost,
+        'time': [0]*6,
+        'age': {'10':0, '20':0, '30':0, '40':0, '50':0, '60':0},
+        'day': {'Mon':0, 'Tue':0, 'Wed':0, 'Thu':0, 'Fri':0, 'Sat':0, 'Sun':0}
+    }
+
+def row_values(row, measures):
+    return [int(row.get(col, 0)) for _, _, col in measures]
+
+def add_values(target, measures, values):
+    for (key, sub, _), val in zip(measures, values):
+        if sub is None: target[key] += val
+        else: target[key][sub] += val
+
+def part_values(part, measures):
+    return [part[key] if sub is None else part[key][sub] for key, sub, _ in measures]
+
+def roll_up(q_parts, measures, with_count):
+    # Per-(dong, industry, quarter) partials -> per-(dong, industry), in the
+    # same first-seen order a direct aggregate_file() pass would give.
+    parts = {}
+    for (dong, ind, _), q_part in q_parts.items():
+        part = parts.get((dong, ind))
+        if part is None: part = parts[(dong, ind)] = new_industry(0)
+        if with_count: part['count'] = max(part['count'], q_part['count'])
+        for name in ('q_stores', 'q_rev'):
+            for q, val in q_part.get(name, {}).items():
+                merged = part.setdefault(name, {})
+                merged[q] = merged.get(q, 0) + val
+        add_values(part, measures, part_values(q_part, measures))
+    return parts
+
+def iter_rows(path, encoding, on_row=None):
+    # (dong, industry, row) for every row in the analysis window. on_row, if
+    # given, sees every row, including those outside the window.
+    with open_input(path, encoding) as f:
+        for row in csv.DictReader(f):
+            if on_row: on_row(row)
+            yr = row.get('기준_년분기_코드', '')[:4]
+            if yr not in ANALYSIS_YEARS: continue
+            yield row.get('행정동_코드_명'), row.get('서비스_업종_코드_명'), row
+
+def aggregate_file(parts, path, measures, with_count, sample=None, by_quarter=False, category=None):
+    # Fill `parts` with one partial per (dong, industry), or per (dong, industry,
+    # quarter) with by_quarter. In preview mode rows only go into the sample and
+    # the partials are estimated from it at the end. `category`, if given, also
+    # collects the per-industry sums for category_stats.json (full pass only).
+    if sample is not None:
+        _estimate_from_sample(parts, _sample_file(path, sample), measures, with_count, sample)
+        return
+
+    on_row = None
+    if category is not None:
+        fields = CATEGORY_STORES if with_count else CATEGORY_SALES
+        on_row = lambda row: add_category_row(category, fields, row)
+    for dong, ind, row in iter_rows(path, 'cp949', on_row):
         dong = normalize_dong(dong)
-        if not dong: return None
-        
+        if not dong: continue
+        key = (dong, ind, row.get('기준_년분기_코드')) if by_quarter else (dong, ind)
+        if key not in parts: parts[key] = new_industry(0)
+
+        part = parts[key]
+        try:
+            values = row_values(row, measures)
+            q = row.get('기준_년분기_코드')
+            if with_count:
+                stores = int(row.get('점포_수', 0))
+                part['count'] = max(part['count'], stores)
+                q_stores = part.setdefault('q_stores', {})
+                q_stores[q] = q_stores.get(q, 0) + stores
+            else:
+                q_rev = part.setdefault('q_rev', {})
+                q_rev[q] = q_rev.get(q, 0) + values[0] # REVENUE_MEASURES[0] is 'rev'
+            add_values(part, measures, values)
+        except: pass
+
+def _sample_file(path, sample):
+    # Preview pass: plain csv.reader lists, and only the key columns are looked
+    # at per row. Measures are parsed later, for the kept rows only.
+    names = {}
+    add = sample.add
+    with open_input(path, 'cp949') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        q_i, dong_i, ind_i = (header.index(c) for c in ('기준_년분기_코드', '행정동_코드_명', '서비스_업종_코드_명'))
+        width = max(q_i, dong_i, ind_i) + 1
+        for row in reader:
+            if len(row) < width or row[q_i][:4] not in ANALYSIS_YEARS: continue
+            raw = row[dong_i]
+            dong = names.get(raw)
+            if dong is None: dong = names[raw] = normalize_dong(raw) or ''
+            if dong: add((dong, row[ind_i]), row)
+    return header
+
+def _estimate_from_sample(parts, header, measures, with_count, sample):
+    # Missing columns read as 0, like row_values() on a DictReader row.
+    cols = [header.index(col) if col in header else None for _, _, col in measures]
+    count_i = header.index('점포_수') if '점포_수' in header else None
+    keys, seens, samples = [], [], []
+    for key, seen, rows in sample.strata():
+        part = parts.setdefault(key, new_industry(0))
+        try:
+            if with_count: part['count'] = max(int(row[count_i]) if count_i is not None else 0 for row in rows)
+            values = [[int(row[i]) if i is not None else 0 for i in cols] for row in rows]
+        except: continue
+        keys.append(key)
+        seens.append(seen)
+        samples.append(values)
+
+    if np is None:
+        for key, seen, values in zip(keys, seens, samples):
+            apply_estimate(parts[key], measures, values, seen)
+        return
+    totals, bounds = estimate_totals(samples, seens, sample.size, len(measures))
+    for key, total, interval in zip(keys, totals, bounds):
+        set_estimate(parts[key], measures, total, interval)
+
+def build_industry(key, store_parts, revenue_parts, costs):
+    # Merge the per-file partials of one (dong, industry). Industries seen only
+    # in the revenue file keep the historical store count of 1.
+    ind = key[1]
+    target = new_industry(costs.get(ind, 0), count=0 if key in store_parts else 1)
+    for parts, measures in ((store_parts, STORE_MEASURES), (revenue_parts, REVENUE_MEASURES)):
+        part = parts.get(key)
+        if part is None: continue
+        if parts is store_parts: target['count'] = part['count']
+        for name, sub, _ in measures:
+            if sub is None: target[name] = part[name]
+            else: target[name][sub] = part[name][sub]
+        if 'ci' in part:
+            for name, bounds in part['ci'].items(): target.setdefault('ci', {})[name] = bounds
+    return target
+
+def build_final_data(store_parts, revenue_parts, costs, pop_map, rent_map):
+    final_data = {}
+    for key in list(store_parts) + [k for k in revenue_parts if k not in store_parts]:
+        dong, ind = key
         if dong not in final_data:
             final_data[dong] = {
                 'pop': pop_map.get(dong, 0),
                 'rent': rent_map.get(dong, 0),
                 'industries': {}
             }
-        return final_data[dong]
+        final_data[dong]['industries'][ind] = build_industry(key, store_parts, revenue_parts, costs)
+    return final_data
+
+@contextlib.contextmanager
+def atomic_output(path):
+    # Yields a temp path next to `path` and renames it over `path` on success,
+    # so readers (Vite, nginx) only ever see the old or the new file, never a
+    # half-written one.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        yield tmp
+        # mkstemp creates 0600; publish with the old file's mode, or what a
+        # plain open() would have given, so the nginx worker can still read it.
+        try: mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp): os.unlink(tmp)
+        raise
+
+def write_json(path, obj):
+    with atomic_output(path) as tmp:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(obj, ensure_ascii=False)) # One-shot dumps() uses the C encoder; dump() never does
+
+def process_data(preview=False, sample_size=PREVIEW_SAMPLE_SIZE, seed=PREVIEW_SEED, sqlite_path=None):
+    # sqlite_path: also export quarterly facts there (full builds only). The
+    # files are then aggregated per quarter once and rolled up for the JSON.
+    costs = load_startup_costs()
+    pop_map, rent_map = load_pop_rent()
+
+    by_quarter = bool(sqlite_path) and not preview
+    store_parts, revenue_parts = {}, {}
+    store_stats, sales_stats = {}, {}
 
     # 1. Store Data (cp949)
     print("Processing Store Data...")
-    try:
-        with open(FILE_STORE, 'r', encoding='cp949') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                yr = row.get('기준_년분기_코드', '')[:4]
-                if yr not in ['2023', '2024']: continue
-                
-                dong = row.get('행정동_코드_명')
-                entry = get_dong_entry(dong)
-                if not entry: continue
-                ind = row.get('서비스_업종_코드_명')
-
-                if ind not in entry['industries']:
-                    entry['industries'][ind] = {
-                        'rev': 0, 'count': 0, 'open': 0, 'close': 0, 
-                        'cost': costs.get(ind, 0),
-                        'time': [0]*6,
-                        'age': {'10':0, '20':0, '30':0, '40':0, '50':0, '60':0},
-                        'day': {'Mon':0, 'Tue':0, 'Wed':0, 'Thu':0, 'Fri':0, 'Sat':0, 'Sun':0}
-                    }
-                
-                target = entry['industries'][ind]
-                try:
-                    target['count'] = max(target['count'], int(row.get('점포_수', 0))) 
-                    target['open'] += int(row.get('개업_점포_수', 0))
-                    target['close'] += int(row.get('폐업_점포_수', 0))
-                except: pass
+    sample = StratifiedSample(sample_size, seed) if preview else None
+    try: aggregate_file(store_parts, FILE_STORE, STORE_MEASURES, True, sample, by_quarter, store_stats)
     except Exception as e: print(f"Store error: {e}")
 
     # 2. Revenue Data (cp949)
     print("Processing Revenue Data...")
-    try:
-        with open(FILE_REVENUE, 'r', encoding='cp949') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                yr = row.get('기준_년분기_코드', '')[:4]
-                if yr not in ['2023', '2024']: continue
-
-                dong = row.get('행정동_코드_명')
-                entry = get_dong_entry(dong)
-                if not entry: continue
-                ind = row.get('서비스_업종_코드_명')
-                
-                if ind not in entry['industries']:
-                     entry['industries'][ind] = {
-                        'rev': 0, 'count': 1, 'open': 0, 'close': 0, 
-                        'cost': costs.get(ind, 0),
-                        'time': [0]*6,
-                        'age': {'10':0, '20':0, '30':0, '40':0, '50':0, '60':0},
-                        'day': {'Mon':0, 'Tue':0, 'Wed':0, 'Thu':0, 'Fri':0, 'Sat':0, 'Sun':0}
-                    }
-
-                target = entry['industries'][ind]
-                try:
-                    rev = int(row.get('당월_매출_금액', 0))
-                    target['rev'] += rev
-                    
-                    target['time'][0] += int(row.get('시간대_00~06_매출_금액', 0))
-                    target['time'][1] += int(row.get('시간대_06~11_매출_금액', 0))
-                    target['time'][2] += int(row.get('시간대_11~14_매출_금액', 0))
-                    target['time'][3] += int(row.get('시간대_14~17_매출_금액', 0))
-                    target['time'][4] += int(row.get('시간대_17~21_매출_금액', 0))
-                    target['time'][5] += int(row.get('시간대_21~24_매출_금액', 0))
-
-                    target['age']['10'] += int(row.get('연령대_10_매출_금액', 0))
-                    target['age']['20'] += int(row.get('연령대_20_매출_금액', 0))
-                    target['age']['30'] += int(row.get('연령대_30_매출_금액', 0))
-                    target['age']['40'] += int(row.get('연령대_40_매출_금액', 0))
-                    target['age']['50'] += int(row.get('연령대_50_매출_금액', 0))
-                    target['age']['60'] += int(row.get('연령대_60_이상_매출_금액', 0))
-
-                    target['day']['Mon'] += int(row.get('월요일_매출_금액', 0))
-                    target['day']['Tue'] += int(row.get('화요일_매출_금액', 0))
-                    target['day']['Wed'] += int(row.get('수요일_매출_금액', 0))
-                    target['day']['Thu'] += int(row.get('목요일_매출_금액', 0))
-                    target['day']['Fri'] += int(row.get('금요일_매출_금액', 0))
-                    target['day']['Sat'] += int(row.get('토요일_매출_금액', 0))
-                    target['day']['Sun'] += int(row.get('일요일_매출_금액', 0))
-                except: pass
-
+    sample = StratifiedSample(sample_size, seed) if preview else None
+    try: aggregate_file(revenue_parts, FILE_REVENUE, REVENUE_MEASURES, False, sample, by_quarter, sales_stats)
     except Exception as e: print(f"Revenue error: {e}")
 
+    if by_quarter:
+        store_q_parts, revenue_q_parts = store_parts, revenue_parts
+        store_parts = roll_up(store_q_parts, STORE_MEASURES, True)
+        revenue_parts = roll_up(revenue_q_parts, REVENUE_MEASURES, False)
+
+    final_data = build_final_data(store_parts, revenue_parts, costs, pop_map, rent_map)
+
     # 3. Post-process: Average Revenue (Quarterly Sum -> Monthly Avg)
     # Note: If we summed 4 quarters, div by 12. If 1 quarter, div by 3.
     # To be simple, we just assume we aggregated available data. 
@@ -201,10 +590,626 @@ def process_data():
     # For "Monthly Revenue per Store": (rev / count) / (quarters * 3).
     # We will just save raw sums.
 
+    if preview:
+        add_rank_bounds(final_data)
+        print(f"Writing {PREVIEW_FILE}...")
+        write_json(PREVIEW_FILE, final_data)
+        print("Done.")
+        return final_data
+
+    quantiles = build_quantiles(final_data, store_parts, revenue_parts, load_gu_map())
+
     print(f"Writing {OUTPUT_FILE}...")
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(final_data, f, ensure_ascii=False)
+    write_json(OUTPUT_FILE, final_data)
+    print(f"Writing {QUANTILE_FILE}...")
+    write_json(QUANTILE_FILE, quantiles)
+
+    write_similarity(final_data)
+    write_category_stats(sales_stats, store_stats, costs)
+    if by_quarter:
+        try: export_sqlite(sqlite_path, store_q_parts, revenue_q_parts, costs, pop_map, rent_map)
+        except Exception as e: print(f"SQLite error: {e}")
     print("Done.")
+    return final_data
+
+# Revenue Quantiles
+# Revenue per store (당월_매출_금액 / 점포_수 of one quarter) is summarized
+# with t-digests weighted by store count, so each digest approximates the
+# distribution over stores. One digest per (dong, industry) is built from the
+# per-quarter sums gathered in the aggregation pass; the city-wide industry
+# and per-gu digests are merges of those.
+class TDigest:
+    # Merging t-digest (Dunning & Ertl) with the k1 (arcsine) scale function.
+    def __init__(self, compression=TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.centroids = [] # Sorted (mean, weight)
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+
+    def add(self, value, weight=1):
+        self._buffer.append((value, weight))
+        self.total += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self.compression * 5: self.compress()
+
+    def merge(self, other):
+        other.compress()
+        self._buffer.extend(other.centroids)
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self._buffer) >= self.compression * 5: self.compress()
+
+    def _q_limit(self, q):
+        # Largest quantile the centroid starting at q may reach (one unit of k).
+        k = self.compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+        return (math.sin(min(k * 2 * math.pi / self.compression, math.pi / 2)) + 1) / 2
+
+    def compress(self):
+        if not self._buffer: return
+        points = sorted(self.centroids + self._buffer)
+        self._buffer = []
+
+        merged = []
+        mean, weight = points[0]
+        done = 0.0
+        limit = self._q_limit(0.0) * self.total
+        for m, w in points[1:]:
+            if done + weight + w <= limit:
+                weight += w
+                mean += (m - mean) * w / weight
+            else:
+                merged.append((mean, weight))
+                done += weight
+                limit = self._q_limit(done / self.total) * self.total
+                mean, weight = m, w
+        merged.append((mean, weight))
+        self.centroids = merged
+
+    def quantile(self, q):
+        self.compress()
+        if not self.centroids: return None
+        target = q * self.total
+        # Interpolate between centroid centers, anchored at min/max at the ends.
+        prev_pos, prev_val = 0.0, self.min
+        cum = 0.0
+        for mean, weight in self.centroids:
+            pos = cum + weight / 2
+            if target < pos:
+                if pos == prev_pos: return mean
+                return prev_val + (mean - prev_val) * (target - prev_pos) / (pos - prev_pos)
+            prev_pos, prev_val = pos, mean
+            cum += weight
+        if self.total == prev_pos: return self.max
+        return prev_val + (self.max - prev_val) * (target - prev_pos) / (self.total - prev_pos)
+
+    def summary(self):
+        if not self.total: return None
+        return [round(self.quantile(q)) for q in QUANTILES]
+
+def revenue_digest(key, store_parts, revenue_parts):
+    digest = TDigest()
+    stores = store_parts.get(key, {}).get('q_stores', {})
+    for q, rev in revenue_parts.get(key, {}).get('q_rev', {}).items():
+        n = stores.get(q, 0)
+        if n > 0: digest.add(rev / n, n)
+    return digest
+
+def build_quantiles(final_data, store_parts, revenue_parts, gu_map, digests=None):
+    # Sets 'rev_q' on every (dong, industry) and returns the industry/gu summary.
+    # `digests` caches per-(dong, industry) digests between watch-mode rebuilds.
+    if digests is None: digests = {}
+    by_ind, by_gu = {}, {}
+    for dong, entry in final_data.items():
+        gu = gu_map.get(dong)
+        for ind, target in entry['industries'].items():
+            key = (dong, ind)
+            if key not in digests: digests[key] = revenue_digest(key, store_parts, revenue_parts)
+            digest = digests[key]
+            target['rev_q'] = digest.summary()
+            if not digest.total: continue
+            by_ind.setdefault(ind, TDigest()).merge(digest)
+            if gu: by_gu.setdefault(gu, TDigest()).merge(digest)
+    return {
+        'quantiles': list(QUANTILES),
+        'industry': {ind: d.summary() for ind, d in sorted(by_ind.items())},
+        'gu': {gu: d.summary() for gu, d in sorted(by_gu.items())},
+    }
+
+# Category Stats
+# Precomputed inputs for BusinessCategoryAnalysis.jsx, which used to fetch and
+# parse revenue_dong.csv / store_dong.csv in the browser. The sums are taken
+# in the main aggregation pass and, like the component, cover every quarter
+# in the files, not just ANALYSIS_YEARS.
+CATEGORY_SALES = [('salesSum', '당월_매출_금액'), ('weekendSum', '주말_매출_금액'), ('txnSum', '분기당_매출_건수')]
+CATEGORY_STORES = [('storeCountSum', '점포_수'), ('openCountSum', '개업_점포_수'), ('closureRateSum', '폐업_률')]
+
+def safe_float(val):
+    # Same leniency as the component's safeParse for blank/comma values.
+    try: return float(str(val).replace(',', '') or 0)
+    except ValueError: return 0.0
+
+def add_category_row(stats, fields, row):
+    ind = row.get('서비스_업종_코드_명')
+    if not ind: return
+    totals = stats.get(ind)
+    if totals is None: totals = stats[ind] = dict.fromkeys([name for name, _ in fields] + ['count'], 0)
+    for name, col in fields: totals[name] += safe_float(row.get(col))
+    totals['count'] += 1
+
+def _compact(val):
+    return int(val) if float(val).is_integer() else round(val, 4)
+
+def build_category_stats(sales, stores, costs):
+    industries = {}
+    for ind in sorted(sales.keys() | stores.keys()):
+        industries[ind] = {
+            'sales': {k: _compact(v) for k, v in sales[ind].items()} if ind in sales else None,
+            'stores': {k: _compact(v) for k, v in stores[ind].items()} if ind in stores else None,
+        }
+    # Raw cost names; the component still applies its own display-name mapping.
+    return {'industries': industries, 'costs': costs}
+
+def write_category_stats(sales, stores, costs):
+    print(f"Writing {CATEGORY_FILE}...")
+    try: write_json(CATEGORY_FILE, build_category_stats(sales, stores, costs))
+    except Exception as e: print(f"Category stats error: {e}")
+
+# SQLite Export
+# Long-format facts (dong, industry, quarter, measure, value) plus the dong and
+# industry dimensions. The fact table is clustered on (industry, dong, ...) and
+# a second index covers (dong, quarter, ...), so both slicing directions are
+# answered from an index alone.
+SQLITE_SCHEMA = """
+CREATE TABLE dong (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, pop INTEGER, rent INTEGER);
+CREATE TABLE industry (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, cost REAL);
+CREATE TABLE measure (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE fact (
+    industry_id INTEGER NOT NULL REFERENCES industry,
+    dong_id INTEGER NOT NULL REFERENCES dong,
+    quarter INTEGER NOT NULL,
+    measure_id INTEGER NOT NULL REFERENCES measure,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (industry_id, dong_id, quarter, measure_id)
+) WITHOUT ROWID;
+CREATE VIEW fact_named AS
+    SELECT i.name AS industry, d.name AS dong, f.quarter, m.name AS measure, f.value
+    FROM fact f JOIN industry i ON i.id = f.industry_id JOIN dong d ON d.id = f.dong_id
+    JOIN measure m ON m.id = f.measure_id;
+"""
+SQLITE_INDEXES = """
+CREATE INDEX fact_dong_quarter ON fact (dong_id, quarter, industry_id, measure_id, value);
+"""
+
+def measure_name(key, sub):
+    return key if sub is None else f"{key}_{sub}"
+
+SQLITE_MEASURES = ['count'] + [measure_name(key, sub) for key, sub, _ in STORE_MEASURES + REVENUE_MEASURES]
+
+def iter_facts(store_parts, revenue_parts, dong_ids, industry_ids, measure_ids):
+    # Fact rows carry integer keys only; the names live in the dimension tables.
+    for parts, measures in ((store_parts, STORE_MEASURES), (revenue_parts, REVENUE_MEASURES)):
+        for (dong, ind, quarter), part in parts.items():
+            if not ind: continue
+            key = (industry_ids[ind], dong_ids[dong], int(quarter))
+            if parts is store_parts: yield (*key, measure_ids['count'], part['count'])
+            for (m, sub, _), val in zip(measures, part_values(part, measures)):
+                yield (*key, measure_ids[measure_name(m, sub)], val)
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch: yield batch
+
+def export_sqlite(path, store_q_parts, revenue_q_parts, costs, pop_map, rent_map):
+    # *_q_parts: aggregate_file(..., by_quarter=True) output from process_data().
+    keys = store_q_parts.keys() | revenue_q_parts.keys()
+    dong_ids = {dong: i for i, dong in enumerate(sorted({dong for dong, _, _ in keys}), 1)}
+    industry_ids = {ind: i for i, ind in enumerate(sorted({ind for _, ind, _ in keys if ind}), 1)}
+    measure_ids = {m: i for i, m in enumerate(SQLITE_MEASURES, 1)}
+
+    print(f"Writing {path}...")
+    with atomic_output(path) as tmp:
+        conn = sqlite3.connect(tmp)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF') # Throwaway file until the rename
+            with conn: # One transaction for the whole load
+                conn.executescript(SQLITE_SCHEMA)
+                conn.executemany('INSERT INTO dong VALUES (?, ?, ?, ?)',
+                                 [(i, d, pop_map.get(d, 0), rent_map.get(d, 0)) for d, i in dong_ids.items()])
+                conn.executemany('INSERT INTO industry VALUES (?, ?, ?)',
+                                 [(i, ind, costs.get(ind, 0)) for ind, i in industry_ids.items()])
+                conn.executemany('INSERT INTO measure VALUES (?, ?)', [(i, m) for m, i in measure_ids.items()])
+                facts = iter_facts(store_q_parts, revenue_q_parts, dong_ids, industry_ids, measure_ids)
+                for batch in _batched(facts, SQLITE_BATCH):
+                    conn.executemany('INSERT INTO fact VALUES (?, ?, ?, ?, ?)', batch)
+                conn.executescript(SQLITE_INDEXES) # Cheaper to build once after the load
+            conn.execute('ANALYZE')
+        finally:
+            conn.close()
+
+# Preview Mode
+# A deterministic stratified sample: one reservoir per (dong, industry) and
+# file, each with its own seeded RNG so the sample doesn't depend on how the
+# strata interleave in the file. Totals are scaled by seen/kept per stratum.
+class StratifiedSample:
+    def __init__(self, size=PREVIEW_SAMPLE_SIZE, seed=PREVIEW_SEED):
+        self.size = size
+        self.seed = seed
+        self._strata = {} # key -> [seen, next_pick, w, rng, rows]
+
+    def add(self, key, row):
+        stratum = self._strata.get(key)
+        if stratum is None: stratum = self._strata[key] = [0, self.size, 1.0, None, []]
+        stratum[0] += 1
+        if stratum[0] < stratum[1]:
+            if stratum[0] <= self.size: stratum[4].append(row)
+            return
+        if stratum[0] == self.size:
+            stratum[4].append(row)
+        else: # Algorithm L: rows between picks cost one compare
+            stratum[4][self._rng(key, stratum).randrange(self.size)] = row
+        self._skip(key, stratum)
+
+    def _rng(self, key, stratum):
+        # Created on first use, so strata that fit the reservoir never pay for it.
+        if stratum[3] is None:
+            stratum[3] = random.Random(zlib.crc32(f"{self.seed}:{key[0]}:{key[1]}".encode('utf-8')))
+        return stratum[3]
+
+    def _skip(self, key, stratum):
+        rng = self._rng(key, stratum)
+        stratum[2] *= math.exp(math.log(1.0 - rng.random()) / self.size)
+        gap = math.floor(math.log(1.0 - rng.random()) / math.log1p(-stratum[2])) if stratum[2] < 1.0 else 0
+        stratum[1] = stratum[0] + gap + 1
+
+    def strata(self):
+        for key, (seen, _, _, _, rows) in self._strata.items():
+            yield key, seen, rows
+
+def t_95(df):
+    return T_95[df - 1] if df <= len(T_95) else Z_95
+
+def estimate_total(values, seen):
+    # Expansion estimator of a stratum total with a 95% Student-t interval on
+    # n-1 degrees of freedom (finite population correction included, so a
+    # fully sampled stratum is exact).
+    n = len(values)
+    raw = sum(values)
+    if n == seen: return raw, [raw, raw]
+    total = seen * raw / n
+    # Integer moments keep the variance exact for large won amounts.
+    var = (n * sum(v * v for v in values) - raw * raw) / (n * (n - 1)) if n > 1 else 0.0
+    half = t_95(n - 1) * seen * math.sqrt((1 - n / seen) * var / n)
+    return round(total), [max(0, round(total - half)), round(total + half)]
+
+def estimate_totals(samples, seens, size, width):
+    # estimate_total() for every stratum and measure at once (needs numpy).
+    vals = np.zeros((len(samples), size, width))
+    mask = np.zeros((len(samples), size, 1))
+    for i, rows in enumerate(samples):
+        vals[i, :len(rows)] = rows
+        mask[i, :len(rows)] = 1
+    n = mask.sum(axis=1)
+    seen = np.asarray(seens, dtype=float)[:, None]
+    raw = vals.sum(axis=1)
+    mean = raw / n
+    dev = (vals - mean[:, None, :]) * mask
+    var = np.where(n > 1, (dev ** 2).sum(axis=1) / np.maximum(n - 1, 1), 0.0)
+    total = np.where(n == seen, raw, seen * mean)
+    crit = np.append(T_95, Z_95)[np.clip(n - 2, 0, len(T_95)).astype(int)]
+    half = crit * seen * np.sqrt((1 - n / seen) * var / n)
+    total = np.rint(total)
+    bounds = np.stack([np.maximum(0, np.rint(total - half)), np.rint(total + half)], axis=-1)
+    return total.astype(np.int64).tolist(), bounds.astype(np.int64).tolist()
+
+def apply_estimate(target, measures, rows, seen):
+    totals, bounds = zip(*(estimate_total(values, seen) for values in zip(*rows)))
+    set_estimate(target, measures, totals, bounds)
+
+def set_estimate(target, measures, totals, bounds):
+    ci = target.setdefault('ci', {})
+    for (key, sub, _), total, interval in zip(measures, totals, bounds):
+        if sub is None:
+            target[key] = total
+            ci[key] = interval
+        else:
+            target[key][sub] = total
+            if key not in ci: ci[key] = [None]*6 if isinstance(target[key], list) else {}
+            ci[key][sub] = interval
+
+def add_rank_bounds(final_data):
+    # Rank dongs by 'rev' within each industry. rank_ci is the best/worst rank
+    # consistent with the intervals: only dongs whose interval lies entirely
+    # above ours are certainly ahead, any that overlap could be.
+    by_ind = {}
+    for entry in final_data.values():
+        for ind, target in entry['industries'].items():
+            by_ind.setdefault(ind, []).append(target)
+    for targets in by_ind.values():
+        targets.sort(key=lambda t: t['rev'], reverse=True)
+        bounds = [t.get('ci', {}).get('rev', [t['rev'], t['rev']]) for t in targets]
+        los = sorted(lo for lo, _ in bounds)
+        his = sorted(hi for _, hi in bounds)
+        n = len(bounds)
+        for i, t in enumerate(targets):
+            lo, hi = bounds[i]
+            t['rank'] = i + 1
+            # Our own interval never lies above itself but always overlaps itself.
+            t['rank_ci'] = [1 + n - bisect.bisect_right(los, hi), n - bisect.bisect_left(his, lo)]
+
+def print_preview_ranking(final_data, ind, top):
+    rows = [(t['rank'], dong, t) for dong, entry in final_data.items()
+            for name, t in entry['industries'].items() if name == ind]
+    for rank, dong, t in sorted(rows, key=lambda r: r[0])[:top]:
+        lo, hi = t.get('ci', {}).get('rev', [t['rev'], t['rev']])
+        print(f"{rank:>3} [{t['rank_ci'][0]}-{t['rank_ci'][1]}]\t{dong}\t{t['rev']:,} ({lo:,} ~ {hi:,})")
+
+# Dong Similarity
+# Profile = time(6) + age(6) + day(7) revenue buckets of one (dong, industry).
+AGE_KEYS = ['10', '20', '30', '40', '50', '60']
+DAY_KEYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+PROFILE_BLOCKS = [(0, 6), (6, 12), (12, 19)]
+
+def profile_matrix(final_data, ind):
+    dongs, rows = [], []
+    for dong, entry in final_data.items():
+        target = entry['industries'].get(ind)
+        if not target: continue
+        dongs.append(dong)
+        rows.append(list(target['time'])
+                    + [target['age'][a] for a in AGE_KEYS]
+                    + [target['day'][d] for d in DAY_KEYS])
+    m = np.asarray(rows, dtype=float).reshape(len(rows), 19)
+
+    # Each block becomes shares of its own total so time/age/day weigh equally
+    # regardless of market size, then rows are L2-normalized so that a plain
+    # dot product is the cosine similarity.
+    for lo, hi in PROFILE_BLOCKS:
+        block = m[:, lo:hi]
+        sums = block.sum(axis=1, keepdims=True)
+        m[:, lo:hi] = np.divide(block, sums, out=np.zeros_like(block), where=sums > 0)
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    m = np.divide(m, norms, out=np.zeros_like(m), where=norms > 0)
+
+    keep = norms[:, 0] > 0 # Dongs with no revenue breakdown have no profile
+    return [d for d, k in zip(dongs, keep) if k], m[keep]
+
+def _top_k(scores, k):
+    k = min(k, scores.shape[-1])
+    if k <= 0: return np.empty(scores.shape[:-1] + (0,), dtype=int)
+    idx = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, idx, axis=-1), axis=-1, kind='stable')
+    return np.take_along_axis(idx, order, axis=-1)
+
+def build_similarity(final_data, k=SIMILARITY_TOP_K, industries=None):
+    if industries is None:
+        industries = sorted({ind for entry in final_data.values() for ind in entry['industries']})
+    result = {}
+    for ind in industries:
+        dongs, m = profile_matrix(final_data, ind)
+        if len(dongs) < 2: continue
+        sim = m @ m.T
+        np.fill_diagonal(sim, -np.inf) # A dong is not its own neighbour
+        top = _top_k(sim, min(k, len(dongs) - 1))
+        result[ind] = {
+            dong: [[dongs[j], round(float(sim[i, j]), 4)] for j in top[i]]
+            for i, dong in enumerate(dongs)
+        }
+    return result
+
+def similar_dongs(final_data, dong, ind, k=SIMILARITY_TOP_K):
+    # Ad-hoc query: dongs whose `ind` profile is closest to `dong`'s.
+    dongs, m = profile_matrix(final_data, ind)
+    dong = normalize_dong(dong)
+    if dong not in dongs: return []
+    i = dongs.index(dong)
+    scores = m @ m[i]
+    scores[i] = -np.inf
+    return [(dongs[j], round(float(scores[j]), 4)) for j in _top_k(scores, min(k, len(dongs) - 1))]
+
+def write_similarity(final_data, similarity=None):
+    if np is None:
+        print("Similarity skipped: numpy not installed")
+        return None
+    print(f"Writing {SIMILARITY_FILE}...")
+    try:
+        if similarity is None: similarity = build_similarity(final_data)
+        write_json(SIMILARITY_FILE, similarity)
+    except Exception as e: print(f"Similarity error: {e}")
+    return similarity
+
+# Watch Mode
+# Keeps the dimension tables and per-file partials in memory. A changed
+# store/revenue file is re-aggregated and diffed against its old partials, and
+# only the (dong, industry) entries that differ are rebuilt.
+class WarmBuild:
+    def __init__(self):
+        self.costs = load_startup_costs()
+        self.pop_map, self.rent_map = load_pop_rent()
+        self.parts = {FILE_STORE: {}, FILE_REVENUE: {}}
+        self.category = {FILE_STORE: {}, FILE_REVENUE: {}}
+        for source in self.parts:
+            # Like process_data(), the first build goes ahead with what loaded.
+            try: self.parts[source], self.category[source] = self._aggregate(source)
+            except Exception as e: print(f"{source} error: {e}")
+        self.final_data = build_final_data(
+            self.parts[FILE_STORE], self.parts[FILE_REVENUE], self.costs, self.pop_map, self.rent_map)
+        self.similarity = None
+        self.category_stale = True
+        self.gu_map = load_gu_map()
+        self.digests = {}
+
+    def _aggregate(self, source):
+        parts, stats = {}, {}
+        measures, with_count = {
+            FILE_STORE: (STORE_MEASURES, True),
+            FILE_REVENUE: (REVENUE_MEASURES, False),
+        }[source]
+        aggregate_file(parts, source, measures, with_count, category=stats)
+        return parts, stats
+
+    def write(self, industries=None):
+        # industries: those whose similarity rows need recomputing (None = all).
+        quantiles = build_quantiles(self.final_data, self.parts[FILE_STORE], self.parts[FILE_REVENUE],
+                                    self.gu_map, self.digests)
+        print(f"Writing {OUTPUT_FILE}...")
+        write_json(OUTPUT_FILE, self.final_data)
+        print(f"Writing {QUANTILE_FILE}...")
+        write_json(QUANTILE_FILE, quantiles)
+        if self.category_stale:
+            write_category_stats(self.category[FILE_REVENUE], self.category[FILE_STORE], self.costs)
+            self.category_stale = False
+        if np is None or self.similarity is None or industries is None:
+            self.similarity = write_similarity(self.final_data)
+        elif industries:
+            fresh = build_similarity(self.final_data, industries=sorted(industries))
+            for ind in industries:
+                if ind in fresh: self.similarity[ind] = fresh[ind]
+                else: self.similarity.pop(ind, None)
+            write_similarity(self.final_data, self.similarity)
+
+    def reload(self, source):
+        # Returns the set of industries whose revenue profiles changed.
+        if source == FILE_COST:
+            self.costs = load_startup_costs()
+            self.category_stale = True
+            for entry in self.final_data.values():
+                for ind, target in entry['industries'].items(): target['cost'] = self.costs.get(ind, 0)
+            return set()
+        if source in (FILE_POP, FILE_RENT):
+            self.pop_map, self.rent_map = load_pop_rent()
+            self.gu_map = load_gu_map()
+            for dong, entry in self.final_data.items():
+                entry['pop'] = self.pop_map.get(dong, 0)
+                entry['rent'] = self.rent_map.get(dong, 0)
+            return set()
+
+        # Raises on a corrupt or half-written file; the old partials stay in place.
+        old = self.parts[source]
+        new, self.category[source] = self._aggregate(source)
+        self.parts[source] = new
+        self.category_stale = True
+        touched = {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+        for key in touched:
+            dong, ind = key
+            self.digests.pop(key, None)
+            in_any = key in self.parts[FILE_STORE] or key in self.parts[FILE_REVENUE]
+            entry = self.final_data.get(dong)
+            if not in_any:
+                if entry:
+                    entry['industries'].pop(ind, None)
+                    if not entry['industries']: del self.final_data[dong]
+                continue
+            if entry is None:
+                entry = self.final_data[dong] = {
+                    'pop': self.pop_map.get(dong, 0),
+                    'rent': self.rent_map.get(dong, 0),
+                    'industries': {}
+                }
+            entry['industries'][ind] = build_industry(
+                key, self.parts[FILE_STORE], self.parts[FILE_REVENUE], self.costs)
+        print(f"{len(touched)} (dong, industry) entries changed in {source}")
+        return {ind for _, ind in touched}
+
+def _watched_source(name):
+    for source in (FILE_STORE, FILE_REVENUE, FILE_COST, FILE_POP, FILE_RENT):
+        base = os.path.basename(source)
+        if name == base or name in (base + suffix for suffix in COMPRESSED_SUFFIXES):
+            return source
+    return None
+
+def _snapshot():
+    snap = {}
+    with os.scandir(DATA_DIR) as it:
+        for e in it:
+            if e.is_file() and _watched_source(e.name):
+                st = e.stat()
+                snap[e.name] = (st.st_mtime_ns, st.st_size)
+    return snap
+
+def watch():
+    build = WarmBuild()
+    build.write()
+    print(f"Watching {DATA_DIR} (Ctrl+C to stop)...")
+
+    seen = _snapshot()
+    pending, last_change = set(), 0.0
+    try:
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            current = _snapshot()
+            changed = {name for name in seen.keys() | current.keys() if seen.get(name) != current.get(name)}
+            seen = current
+            if changed:
+                pending |= {_watched_source(name) for name in changed}
+                last_change = time.monotonic()
+                continue
+            if not pending or time.monotonic() - last_change < WATCH_DEBOUNCE: continue
+
+            industries, reloaded = set(), False
+            for source in sorted(pending):
+                print(f"Reloading {source}...")
+                try:
+                    industries |= build.reload(source)
+                    reloaded = True
+                except Exception as e:
+                    print(f"{source} error: {e} (keeping the previous output)")
+            pending = set()
+            if not reloaded: continue
+            build.write(industries)
+            print("Done.")
+    except KeyboardInterrupt:
+        print("Stopped.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build seoul_biz_data.json from the Seoul 상권분석 exports.")
+    parser.add_argument('--similar', nargs=2, metavar=('DONG', 'INDUSTRY'),
+                        help="Print the dongs with the most similar revenue profile (uses the last build)")
+    parser.add_argument('-k', type=int, default=SIMILARITY_TOP_K, help="Number of similar dongs to print")
+    parser.add_argument('--preview', action='store_true',
+                        help=f"Estimate from a stratified sample and write {PREVIEW_FILE} with confidence intervals")
+    parser.add_argument('--sample-size', type=int, default=PREVIEW_SAMPLE_SIZE,
+                        help="Rows kept per (dong, industry) in preview mode (at least 2). Intervals use the "
+                             "Student-t value for n-1 degrees of freedom, so small samples give wide bands")
+    parser.add_argument('--seed', type=int, default=PREVIEW_SEED, help="Sampling seed for preview mode")
+    parser.add_argument('--industry', help="With --preview, print this industry's ranking")
+    parser.add_argument('--sqlite', nargs='?', const=SQLITE_FILE, metavar='PATH',
+                        help=f"Also export the facts to SQLite (default: {SQLITE_FILE})")
+    parser.add_argument('--watch', action='store_true',
+                        help=f"Rebuild whenever an input in {DATA_DIR} changes")
+    args = parser.parse_args()
+    if args.sqlite and (args.preview or args.watch or args.similar):
+        parser.error("--sqlite only works with a full build (not with --preview, --watch or --similar)")
+
+    if args.similar:
+        if np is None: parser.error("--similar needs numpy")
+        with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
+            final_data = json.load(f)
+        dong, ind = args.similar
+        for other, score in similar_dongs(final_data, dong, ind, args.k):
+            print(f"{other}\t{score:.4f}")
+        return
+
+    if args.watch:
+        watch()
+        return
+
+    if args.preview:
+        if args.sample_size < 2: parser.error("--sample-size must be at least 2")
+        final_data = process_data(preview=True, sample_size=args.sample_size, seed=args.seed)
+        if args.industry: print_preview_ranking(final_data, args.industry, args.k)
+        return
+
+    process_data(sqlite_path=args.sqlite)
 
 if __name__ == "__main__":
-    process_data()
\ No newline at end of file
+    main()
@@ -1,7 +1,6 @@
 import React, { useEffect, useRef, useState, useMemo } from 'react';
 import * as d3 from 'd3';
 import { Filter, BarChart2, Info, CheckCircle, ArrowRight, Sparkles, Crown, TrendingUp, Award, HelpCircle, Search } from 'lucide-react';
-import { loadCSV } from '../data/csvLoader';
 import LiveTicker from './LiveTicker';
 
 // Industry Name Mapping
@@ -209,6 +208,36 @@ const IndustryRadar = ({ data, color, overlayData }) => {
     );
 };
 
+// Per-industry sums over raw revenue/store rows (only used when rows are passed in as props;
+// otherwise the same sums come precomputed from category_stats.json)
+const aggregateRows = (salesRows, closureRows) => {
+    const safeParse = (val) => parseFloat(String(val).replace(/,/g, '') || 0);
+
+    const industryStats = {};
+    salesRows.forEach((d) => {
+        const ind = d['서비스_업종_코드_명'];
+        if (!ind) return;
+        if (!industryStats[ind]) industryStats[ind] = { name: ind, salesSum: 0, weekendSum: 0, txnSum: 0, count: 0 };
+        industryStats[ind].salesSum += safeParse(d['당월_매출_금액']);
+        industryStats[ind].weekendSum += safeParse(d['주말_매출_금액']);
+        industryStats[ind].txnSum += safeParse(d['분기당_매출_건수']);
+        industryStats[ind].count += 1;
+    });
+
+    const closureStats = {};
+    closureRows.forEach((d) => {
+        const ind = d['서비스_업종_코드_명'];
+        if (!ind) return;
+        if (!closureStats[ind]) closureStats[ind] = { storeCountSum: 0, openCountSum: 0, closureRateSum: 0, count: 0 };
+        closureStats[ind].storeCountSum += safeParse(d['점포_수']);
+        closureStats[ind].openCountSum += safeParse(d['개업_점포_수']);
+        closureStats[ind].closureRateSum += safeParse(d['폐업_률']);
+        closureStats[ind].count += 1;
+    });
+
+    return { industryStats, closureStats };
+};
+
 const BusinessCategoryAnalysis = ({ onNext, youtubeTrends = [], currentTrendIndex = 0, salesData = [], closureData = [] }) => {
     const [maxBudget, setMaxBudget] = useState(3.0); 
     const [minSales, setMinSales] = useState(0); 
@@ -218,8 +247,7 @@ const BusinessCategoryAnalysis = ({ onNext, youtubeTrends = [], currentTrendInde
     const [searchTerm, setSearchTerm] = useState('');
     const [startupCostMap, setStartupCostMap] = useState({});
 
-    const [internalSalesData, setInternalSalesData] = useState([]);
-    const [internalClosureData, setInternalClosureData] = useState([]);
+    const [categoryStats, setCategoryStats] = useState(null);
     // const [industryData, setIndustryData] = useState([]); // REMOVED STATE
     const svgRef = useRef(null);
     const tooltipRef = useRef(null);
@@ -232,75 +260,49 @@ const BusinessCategoryAnalysis = ({ onNext, youtubeTrends = [], currentTrendInde
         }
     }, [selectedIndustry]);
 
-    // Data Loading
+    // Data Loading (precomputed by process_seoul_data.py -> category_stats.json)
     useEffect(() => {
-        if (salesData.length === 0 && internalSalesData.length === 0) {
+        if (salesData.length === 0 && !categoryStats) {
             const fetchData = async () => {
                 try {
-                    const sales = await loadCSV('revenue_dong.csv', 'EUC-KR');
-                    const closure = await loadCSV('store_dong.csv', 'EUC-KR');
-                    setInternalSalesData(sales);
-                    setInternalClosureData(closure);
+                    const response = await fetch('/data/category_stats.json');
+                    const stats = await response.json();
+                    setCategoryStats(stats);
 
-                    const costs = await loadCSV('startup_costs_2024.csv', 'UTF-8');
                     const costMap = {};
-                    costs.forEach(row => {
-                        const rawCost = row['합계금액'];
-                        const rawName = row['서비스_업종_코드_명'];
-                        if (rawCost && rawName) {
-                            let costVal = parseFloat(String(rawCost).replace(/,/g, ''));
-                            if (!isNaN(costVal)) {
-                                let mappedName = NAME_MAPPING[rawName];
-                                if (!mappedName) {
-                                    const foundKey = Object.keys(NAME_MAPPING).find(key => rawName.includes(key));
-                                    if (foundKey) mappedName = NAME_MAPPING[foundKey];
-                                }
-                                if (!mappedName) mappedName = rawName;
-
-                                if (mappedName) costMap[mappedName] = costVal;
-                            }
+                    Object.entries(stats.costs || {}).forEach(([rawName, costVal]) => {
+                        let mappedName = NAME_MAPPING[rawName];
+                        if (!mappedName) {
+                            const foundKey = Object.keys(NAME_MAPPING).find(key => rawName.includes(key));
+                            if (foundKey) mappedName = NAME_MAPPING[foundKey];
                         }
+                        if (!mappedName) mappedName = rawName;
+
+                        if (mappedName) costMap[mappedName] = costVal;
                     });
                     setStartupCostMap(costMap);
                 } catch (error) {
-                    console.error("Failed to load CSV data:", error);
+                    console.error("Failed to load category stats:", error);
                 }
             };
             fetchData();
         }
-    }, [salesData.length, internalSalesData.length]);
+    }, [salesData.length, categoryStats]);
 
     // Data Processing (Converted to useMemo)
     const industryData = useMemo(() => {
-        let processedSales = salesData.length > 0 ? salesData : internalSalesData;
-        let processedClosure = closureData.length > 0 ? closureData : internalClosureData;
-        if (processedSales.length === 0) return [];
-
-        const industryStats = {};
-        processedSales.forEach((d) => {
-            const ind = d['서비스_업종_코드_명'];
-            if (!ind) return;
-            if (!industryStats[ind]) industryStats[ind] = { name: ind, salesSum: 0, weekendSum: 0, txnSum: 0, count: 0 };
-            const safeParse = (val) => parseFloat(String(val).replace(/,/g, '') || 0);
-            industryStats[ind].salesSum += safeParse(d['당월_매출_금액']);
-            industryStats[ind].weekendSum += safeParse(d['주말_매출_금액']);
-            industryStats[ind].txnSum += safeParse(d['분기당_매출_건수']);
-            industryStats[ind].count += 1;
-        });
-
-        const closureStats = {};
-        processedClosure.forEach((d) => {
-            const ind = d['서비스_업종_코드_명'];
-            if (!ind) return;
-            if (!closureStats[ind]) closureStats[ind] = { storeCountSum: 0, openCountSum: 0, closureRateSum: 0, count: 0 };
-            const safeParse = (val) => parseFloat(String(val).replace(/,/g, '') || 0);
-            closureStats[ind].storeCountSum += safeParse(d['점포_수']);
-            closureStats[ind].openCountSum += safeParse(d['개업_점포_수']);
-            closureStats[ind].closureRateSum += safeParse(d['폐업_률']);
-            closureStats[ind].count += 1;
-        });
-
-        console.log("DEBUG: Processed Closure Count:", processedClosure.length); // DEBUG LOG
+        let industryStats = {};
+        let closureStats = {};
+        if (salesData.length > 0) {
+            ({ industryStats, closureStats } = aggregateRows(salesData, closureData));
+        } else if (categoryStats) {
+            Object.entries(categoryStats.industries).forEach(([ind, s]) => {
+                if (s.sales) industryStats[ind] = { name: ind, ...s.sales };
+                if (s.stores) closureStats[ind] = s.stores;
+            });
+        } else {
+            return [];
+        }
 
         const processed = Object.keys(industryStats).map(ind => {
             const s = industryStats[ind];
@@ -434,7 +436,7 @@ const BusinessCategoryAnalysis = ({ onNext, youtubeTrends = [], currentTrendInde
         });
 
         return finalData;
-    }, [salesData, closureData, internalSalesData, internalClosureData, startupCostMap]);
+    }, [salesData, closureData, categoryStats, startupCostMap]);
 
     const filteredData = useMemo(() => {
         if (industryData.length === 0) return [];
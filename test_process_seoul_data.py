@@ -0,0 +1,61 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import process_seoul_data as psd
+
+def csv_text(rows, tag=''):
+    return ''.join(f"{i},{tag}동{i % 97},{i * 7919 % 100003}\n" for i in range(rows)).encode('utf-8')
+
+class OpenInputTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f: f.write(data)
+        return path
+
+    def read(self, path, encoding='utf-8'):
+        with psd.open_input(path, encoding) as f: return f.read().encode(encoding)
+
+    def test_large_single_member_gzip_is_streamed(self):
+        data = csv_text(1_500_000)
+        path = self.write('single.csv.gz', gzip.compress(data, compresslevel=1))
+        with open(path, 'rb') as f: self.assertFalse(psd._is_multi_member(f.read()))
+        with mock.patch.object(psd, '_iter_gzip_members', side_effect=AssertionError('parallel path')):
+            self.assertEqual(self.read(path), data)
+
+    def test_multi_member_gzip(self):
+        parts = [csv_text(50_000, 'a'), csv_text(400_000, 'b'), b'', csv_text(3, 'c')]
+        path = self.write('multi.csv.gz', b''.join(gzip.compress(p) for p in parts))
+        with open(path, 'rb') as f: self.assertTrue(psd._is_multi_member(f.read()))
+        # A small limit sends the larger members through the reader's streaming path
+        with mock.patch.object(psd, 'DECOMPRESS_MEMBER_LIMIT', 1 << 20):
+            self.assertEqual(self.read(path), b''.join(parts))
+
+    def test_member_embedded_in_stored_block(self):
+        # A complete gzip member inside a stored block looks like a real candidate
+        inner = csv_text(10) + gzip.compress(b'not a member') + csv_text(10)
+        path = self.write('stored.csv.gz', gzip.compress(inner, compresslevel=0) + gzip.compress(b'tail\n'))
+        self.assertEqual(self.read(path, 'latin-1'), inner + b'tail\n')
+
+    def test_corrupt_member_raises(self):
+        blob = bytearray(gzip.compress(csv_text(1000)) + gzip.compress(csv_text(1000)))
+        blob[len(blob) // 4] ^= 0xFF
+        path = self.write('corrupt.csv.gz', bytes(blob))
+        with self.assertRaises((OSError, EOFError)): self.read(path)
+
+    @unittest.skipIf(psd.zstandard is None, "zstandard not installed")
+    def test_multi_frame_zstd(self):
+        parts = [csv_text(200_000, 'a'), csv_text(20, 'b')]
+        cctx = psd.zstandard.ZstdCompressor()
+        path = self.write('multi.csv.zst', b''.join(cctx.compress(p) for p in parts))
+        with mock.patch.object(psd, 'DECOMPRESS_MEMBER_LIMIT', 1 << 20):
+            self.assertEqual(self.read(path), b''.join(parts))
+
+if __name__ == '__main__':
+    unittest.main()